@@ -30,7 +30,8 @@ class EbayVariables:
         How long to wait between url calls. This is to prevent DoSing eBay's servers and having your connection killed
 
     show_plots : bool - default=False
-        Whether to display plots as the code runs, always saves to a directory regardless
+        Whether to display plots as the code runs, always saves to a directory regardless. Requires the MPLBACKEND
+        environment variable to be set to an interactive backend (e.g. TkAgg), otherwise plots use Agg and aren't shown
     main_plot : bool - default=False
         Whether to show the Sales Plot as the code runs, always saves to a directory regardless. If show_plots is False
         this is False
@@ -15,26 +15,262 @@ Current functions:
 """
 
 import math
+import os
+import re
 import warnings
-from copy import deepcopy
 from datetime import timedelta, datetime
-from typing import List, Tuple
+from functools import lru_cache
+from typing import List, Tuple, Union
 
+import matplotlib
 import matplotlib.patches as mpatches
 import matplotlib.ticker as ticker
+import numpy as np
 import numpy.polynomial.polynomial as poly
 import pandas as pd
 from fastquant import get_crypto_data
-from matplotlib import pyplot as plt
-from sklearn.metrics import r2_score
+
+# Plots are always saved to disk, so default to the non-GUI Agg backend. To get the plt.show() windows from show_plots,
+# set the MPLBACKEND environment variable to an interactive backend, e.g. MPLBACKEND=TkAgg
+matplotlib.use(os.environ.get('MPLBACKEND') or 'Agg')
+from matplotlib import pyplot as plt  # pylint: disable=wrong-import-position
+
+plt.ioff()
 
 from classes import EbayVariables
 from util import prep_df
 
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+try:
+    from plotting_kernels import bucket_sum, fit_eval
+except ImportError:
+    bucket_sum = fit_eval = None
+
+# Large sold-listing sets are drawn as a single batched line, let Agg simplify and chunk the paths
+plt.rcParams.update({'path.simplify': True, 'path.simplify_threshold': 1.0, 'agg.path.chunksize': 10000,
+                     'figure.autolayout': False})
+# PNG encoding is zlib bound, level 3 is much faster than the default 6 for slightly larger files
+_SAVE_KW = dict(dpi=90, bbox_inches='tight', pil_kwargs={'compress_level': 3})
+
+# eBay star rating bands, https://blog.edesk.com/resources/ebay-star-ratings/
+_FEEDBACK_BINS = [0, 1, 10, 50, 100, 500, 1000, 5000, 10000, np.inf]
+_FEEDBACK_LABELS = ['Zero FB', '1 - 9', '10 - 49', '50 - 99', '100 - 499', '500 - 999', '1000 - 4999', '5000 - 9999',
+                    '10000+']
+
+# Total number of sales per seller, the bins are the lower edges of every bucket after the first for np.digitize
+_SALES_BINS = np.array([2, 3, 4, 5, 6, 11, 21, 50], dtype=np.int64)
+_SALES_LABELS = ['1', '2', '3', '4', '5', '6 - 10', '11 - 20', '21 - 49', '50 +']
+
+# GPU ETH hashrates (MH/s), https://cryptoage.com/en/2380-the-current-table-with-the-hash-rate-of-videocards-for-2021.html
+_HASH_RE = re.compile(r'(3060 Ti|3080 Ti|3060|3070|3080|3090)')
+_HASH_RATES = {'3060 Ti': 59, '3060': 37.5, '3070': 59, '3080 Ti': 64, '3080': 100, '3090': 111}
+
+# Line colors, picked using this https://mokole.com/palette.html
+_COLORS_DEFAULT = ('#000000', '#7f0000', '#808000', '#008080', '#000080', '#ff8c00', '#2f4f4f', '#00ff00', '#0000ff',
+                   '#ff00ff', '#6495ed', '#ff1493', '#98fb98', '#ffdab9')
+_COLORS_MEAN = ('#ED2939', '#FF2400', '#CD5C5C', '#7C0A02', '#0B6623', '#708238', '#3F704D', '#8F9779', '#00755E',
+                '#004B49', '#6495ed', '#ff1493', '#98fb98', '#ffdab9')
+
+# Figures reused between calls of the plotting functions, keyed by the plot they're used for
+_FIG_POOL = {}
+
+
 
 # pylint: disable=line-too-long
 # pylint: disable=multiple-statements
 
+@lru_cache(maxsize=32)
+def _crypto_prices(symbol: str,
+                   min_date: str,
+                   max_date: str) -> pd.DataFrame:
+    """
+    Wraps get_crypto_data so the same symbol/date window is only downloaded once, first from memory and then from the
+    pickled copy in the cache directory. Windows reaching today (UTC, as the exchange candles are) are never written to
+    or read from the cache directory, as the last day's candle is still changing
+
+    Parameters
+    ----------
+    symbol : Trading pair as used by get_crypto_data, e.g. "ETH/USDT"
+    min_date : First date to get, formatted YYYY-MM-DD
+    max_date : Last date to get, formatted YYYY-MM-DD
+
+    Returns
+    -------
+    The DataFrame returned by get_crypto_data
+
+    """
+    cache_file = f"cache/{symbol.replace('/', '_')}_{min_date}_{max_date}.pkl"
+    complete = max_date < datetime.utcnow().strftime('%Y-%m-%d')
+    if complete and os.path.exists(cache_file):
+        return pd.read_pickle(cache_file)
+
+    crypto_df = get_crypto_data(symbol, min_date, max_date)
+    if complete:
+        if not os.path.exists('cache'):
+            os.makedirs('cache')
+        crypto_df.to_pickle(cache_file)
+    return crypto_df
+
+
+def _get_fig(key: str,
+             figsize: Tuple[float, float] = None,
+             nrows: int = 1,
+             ncols: int = 1,
+             tight_layout: bool = False):
+    """
+    Gets a cleared figure from the pool for the given key, only creating a new one the first time or if the previous
+    one has since been closed (e.g. its plt.show() window was closed). The figure is made pyplot's current figure.
+
+    Parameters
+    ----------
+    key : Name of the plot the figure is used for
+    figsize : Size of the figure in inches, defaults to the rcParams figure size
+    nrows : Number of rows of subplots
+    ncols : Number of columns of subplots
+    tight_layout : Whether the figure uses tight_layout, only applied when the figure is created
+
+    Returns
+    -------
+    The figure and its axes as returned by Figure.subplots
+
+    """
+    fig = _FIG_POOL.get(key)
+    if fig is None or not plt.fignum_exists(fig.number):
+        fig = plt.figure(figsize=figsize, tight_layout=tight_layout or None)
+        _FIG_POOL[key] = fig
+    else:
+        plt.figure(fig.number)
+        fig.clf(keep_observers=True)
+        # Layout adjustments made by the previous plot would otherwise carry over
+        fig.subplotpars = matplotlib.figure.SubplotParams()
+        fig.set_size_inches(figsize or plt.rcParams['figure.figsize'])
+        fig.set_facecolor(plt.rcParams['figure.facecolor'])
+
+    return fig, fig.subplots(nrows, ncols)
+
+
+def _rolling_stat(series: pd.Series,
+                  roll: int,
+                  stat: str = 'mean') -> pd.Series:
+    """
+    Rolling mean, standard deviation, or median over the last roll values, equivalent to series.rolling(roll,
+    min_periods=1).mean()/.std()/.median(). Uses bottleneck's moving window functions when it is installed, its
+    move_median keeps the window in a double heap so long windows stay cheap
+
+    Parameters
+    ----------
+    series : Series to roll over
+    roll : Window length
+    stat : One of 'mean', 'std', or 'median'
+
+    Returns
+    -------
+    The rolled Series, with the same index as series
+
+    """
+    if bn is None:
+        rolling = series.rolling(roll, min_periods=1)
+        if stat == 'median':
+            return rolling.median()
+        return rolling.std() if stat == 'std' else rolling.mean()
+
+    if series.empty:
+        return series
+
+    values = series.to_numpy(np.float64)
+    # bottleneck rejects windows longer than the series, with min_count=1 the partial windows are the same either way
+    window = min(roll, len(values))
+    if stat == 'std':
+        rolled = bn.move_std(values, window=window, min_count=1, ddof=1)
+    elif stat == 'median':
+        rolled = bn.move_median(values, window=window, min_count=1)
+    else:
+        rolled = bn.move_mean(values, window=window, min_count=1)
+    return pd.Series(rolled, index=series.index)
+
+
+def _poly_trend(x_days: np.ndarray,
+                y: np.ndarray,
+                degree: int,
+                x_future: np.ndarray) -> Tuple[np.ndarray, np.ndarray, float]:
+    """
+    Fits a polynomial trendline and evaluates it for plotting and for its goodness of fit in one go. Uses the compiled
+    plotting_kernels.fit_eval when it has been built (see setup.py)
+
+    Parameters
+    ----------
+    x_days : Day offsets of the observed values
+    y : Observed values
+    degree : Degree of the polynomial
+    x_future : Day offsets to evaluate the trendline at for plotting
+
+    Returns
+    -------
+    The polynomial coefficients, the trendline evaluated at x_future, and the R squared of the fit against y
+
+    """
+    # With no more points than the degree the fit is underdetermined, polyfit picks the minimum norm fit and warns
+    if fit_eval is not None and len(x_days) > degree:
+        try:
+            return fit_eval(np.ascontiguousarray(x_days, dtype=np.float64), np.ascontiguousarray(y, dtype=np.float64),
+                            degree, np.ascontiguousarray(x_future, dtype=np.float64))
+        except np.linalg.LinAlgError:
+            pass  # Ill conditioned fit, let polyfit handle it and warn about overfitting
+
+    coefs = poly.polyfit(x_days, y, degree)
+    ffit_future = poly.polyval(x_future, coefs)
+
+    residuals = y - poly.polyval(x_days, coefs)
+    ss_tot = np.sum((y - y.mean()) ** 2)
+    r_squared = 1.0 - np.sum(residuals ** 2) / ss_tot if ss_tot > 0 else 1.0
+    return coefs, ffit_future, r_squared
+
+
+def _prep_brand_frames(dfs: List[pd.DataFrame],
+                       brand_list: List[str],
+                       print_stats: bool = False) -> pd.DataFrame:
+    """
+    Preps and concatenates the frames for brand_plot, optionally printing the per brand stats of each frame
+
+    Parameters
+    ----------
+    dfs : Input frames, as passed to brand_plot
+    brand_list : Brands to print stats for and to keep
+    print_stats : Whether to print the count, mean, and total price of every brand in each frame
+
+    Returns
+    -------
+    The concatenated frame, with Brand categorical and Total Price as a positive fraction of MSRP
+
+    """
+    # Only brands in brand_list are ever used, sharing one categorical dtype keeps Brand categorical through the concat
+    brand_dtype = pd.CategoricalDtype(list(dict.fromkeys(brand_list)))
+
+    # prep_df hands back a new frame, so the caller's frames are never modified and need no copy up front
+    brand_dfs = []
+    for df in dfs:
+        df = prep_df(df)
+        df['Brand'] = df['Brand'].astype(brand_dtype)
+        df['Sold Date'] = pd.to_datetime(df['Sold Date'], cache=True)
+        if print_stats:
+            brand_stats = df.groupby('Brand', sort=False, observed=True)['Total Price'].agg(['size', 'mean', 'sum'])
+            for brand in brand_list:
+                if brand in brand_stats.index:
+                    print(df.item.iloc[0], brand, brand_stats.at[brand, 'size'], round(brand_stats.at[brand, 'mean']),
+                          round(brand_stats.at[brand, 'sum']))
+        df['Total Price'] = df['Total Price'].to_numpy() / df['msrp'].to_numpy()
+        brand_dfs.append(df)
+
+    df = pd.concat(brand_dfs)
+    # A missing, zero, or negative msrp leaves no usable fraction of MSRP (NaN, inf, or negative respectively)
+    fractions = df['Total Price'].to_numpy()
+    return df[np.isfinite(fractions) & (fractions > 0)]
+
+
 def ebay_plot(query: str,
               msrp: float,
               df: pd.DataFrame,
@@ -61,28 +297,30 @@ def ebay_plot(query: str,
     # https://stackoverflow.com/questions/59723501/plotting-a-linear-regression-with-dates-in-matplotlib-pyplot
     df_calc = prep_df(df)
 
-    median_prices = df_calc.groupby(['Sold Date'])['Total Price'].median()
-    max_price = df_calc.groupby(['Sold Date'])['Total Price'].max()
-    min_price = df_calc.groupby(['Sold Date'])['Total Price'].min()
-    total_sold = df_calc['Quantity'].sum()
-    max_med = max(median_prices)
-    max_max = max(max_price)
-    min_min = min(min_price)
-    median_price = int(df_calc['Total Price'].median())
+    # prep_df returns the rows ordered by Sold Date, so the groups already come out in date order without sorting
+    agg_prices = df_calc.groupby('Sold Date', sort=False)['Total Price'].agg(['median', 'max', 'min'])
+    median_prices, max_price, min_price = agg_prices['median'], agg_prices['max'], agg_prices['min']
+    total_sold = df_calc['Quantity'].to_numpy().sum()
+    max_med = median_prices.to_numpy().max()
+    max_max = max_price.to_numpy().max()
+    min_min = min_price.to_numpy().min()
+    # np.median already selects with np.partition, so it is linear time and handles even lengths like pandas did
+    median_price = int(np.median(df_calc['Total Price'].to_numpy()))
 
     est_break_even = 0
     min_break_even = 0
 
     plt.style.use('ggplot')
 
-    fig, ax1 = plt.subplots(figsize=(10, 8))
+    fig, ax1 = _get_fig('ebay_plot', figsize=(10, 8))
 
     color = 'tab:blue'
     plt.title(
             query.replace("+", " ").split('-', 1)[0].strip() + e_vars.extra_title_text + ' eBay Sold Prices Over Time',
             size=20)
 
-    ax1.scatter(df_calc['Sold Date'], df_calc['Total Price'], alpha=0.5, s=10, label='Sold Listing', color=color)
+    ax1.plot(df_calc['Sold Date'].values, df_calc['Total Price'].values, marker='.',
+             linestyle='None', markersize=3, alpha=0.5, label='Sold Listing', color=color, rasterized=True)
     estimated_shipping = 0
 
     if msrp > 0:
@@ -116,8 +354,8 @@ def ebay_plot(query: str,
 
         if plot_msrp:
             ax1.axhline(y=msrp, label=f'MSRP - {e_vars.ccode}{msrp}', color=color)
-    ax1.plot(median_prices, linewidth=3, color='dimgray', label=f'Median Price - {e_vars.ccode}{median_price}',
-             zorder=999)
+    ax1.plot(median_prices.index.values, median_prices.to_numpy(), linewidth=3, color='dimgray',
+             label=f'Median Price - {e_vars.ccode}{median_price}', zorder=999)
     # plt.plot(sold_date, m * sold_date + b)
     ax1.set_ylabel("Sold Price", color=color)
     ax1.tick_params(axis='y', labelcolor=color)
@@ -161,29 +399,25 @@ def ebay_plot(query: str,
                 project_date = e_vars.trend_param[1]
 
             # Plotting Trendline
-            x_orig = median_prices.index.tolist()
-            x_orig = [i.toordinal() for i in x_orig]
-            x_orig = [i - df_calc['Sold Date'].min().toordinal() for i in x_orig]
+            day0 = df_calc['Sold Date'].min().to_numpy().astype('datetime64[D]').astype(np.int64)
+            x_orig = median_prices.index.values.astype('datetime64[D]').astype(np.int64) - day0
 
             max_date = df_calc['Sold Date'].max() + timedelta(project_date)
             date_diff = (df_calc['Sold Date'].max() - df_calc['Sold Date'].min()).days + project_date
-            date_list = [max_date - timedelta(days=x) for x in range(date_diff)]
-            date_list.sort()
+            date_list = pd.date_range(end=max_date, periods=date_diff, freq='D')
+
+            max_x_poly = x_orig.max() - x_orig.min() + 1
+            x_poly = np.arange(1, max_x_poly + project_date)
 
             with warnings.catch_warnings(record=True) as caught_warnings:
-                coefs = poly.polyfit(x_orig, median_prices, degree)
+                coefs, ffit, r_squared = _poly_trend(x_orig, median_prices.to_numpy(np.float64), degree, x_poly)
                 if e_vars.verbose: print('Polynomial Coefficients: ', coefs)
                 for warn in caught_warnings:
                     print('WARNING: Polynomial may be overfit, try a lower order polynomial')
 
-            max_x_poly = max(x_orig) - min(x_orig) + 1
-            x_poly = [*range(1, max_x_poly + project_date, 1)]
-            ffit = poly.polyval(x_poly, coefs)
-
             ax2.plot(date_list, ffit)
-            ffit = poly.polyval(x_orig, coefs)
 
-            print('R Squared:', r2_score(ffit, median_prices))
+            print('R Squared:', r_squared)
 
         elif e_vars.trend_type == 'roll':
             med_roll = median_prices.rolling(e_vars.trend_param[0], min_periods=1).mean()
@@ -196,8 +430,9 @@ def ebay_plot(query: str,
     plt.subplots_adjust(bottom=0.225)
 
     plt.gcf().text(0.8, 0.008, '@driscoll42', fontsize=9)
-    plt.savefig('Images/' + query + e_vars.extra_title_text)
+    plt.savefig('Images/' + query + e_vars.extra_title_text, **_SAVE_KW)
     if e_vars.show_plots and e_vars.main_plot: plt.show()
+    fig.clf(keep_observers=True)
 
     return median_price, est_break_even, min_break_even, tot_sold, estimated_shipping
 
@@ -219,9 +454,9 @@ def plot_profits(df: pd.DataFrame,
     -------
 
     """
-    df = prep_df(deepcopy(df))
+    df = prep_df(df.copy(deep=False))
 
-    med_price = df.groupby(['Sold Date'])['Total Price'].median() / msrp * 100
+    med_price = df.groupby('Sold Date', sort=False)['Total Price'].median() / msrp * 100
 
     estimated_shipping = df.loc[df['Shipping'] > 0]
     estimated_shipping = estimated_shipping['Shipping'].median()
@@ -229,38 +464,42 @@ def plot_profits(df: pd.DataFrame,
         estimated_shipping = 0
 
     # Very useful site for determining all this: https://www.ebayfeescalculator.com/usa-ebay-calculator/
-    df['eBay Profits'] = df['Total Price'] * e_vars.non_store_rate * (1 - df['Store']) \
-                         + df['Total Price'] * e_vars.store_rate * df['Store']
+    total_price = df['Total Price'].to_numpy(np.float64)
+    store = df['Store'].to_numpy(np.float64)
+    fee_rate = np.where(store == 1, e_vars.store_rate, e_vars.non_store_rate)
 
-    df['PayPal Profits'] = df['Total Price'] * 0.029 + 0.30
+    ebay_profits = total_price * fee_rate
+    paypal_profits = total_price * 0.029 + 0.30
+    scalper_cost = msrp * (1.0 + e_vars.tax_rate) + estimated_shipping
+    scalper_profits = total_price - scalper_cost - ebay_profits - paypal_profits
 
-    df['Scalper Profits'] = df['Store'] * (df['Total Price']
-                                           - (msrp * (1.0 + e_vars.tax_rate) + estimated_shipping)
-                                           - (df['Total Price'] * e_vars.store_rate)
-                                           - (df['Total Price'] * 0.029 + 0.30)) + ((1 - df['Store']) * (
-            df['Total Price'] \
-            - (msrp * (1.0 + e_vars.tax_rate) + estimated_shipping) \
-            - (df['Total Price'] * e_vars.non_store_rate) \
-            - (df['Total Price'] * 0.029 + 0.30)))
+    df[['eBay Profits', 'PayPal Profits', 'Scalper Profits']] = np.column_stack(
+            [ebay_profits, paypal_profits, scalper_profits])
 
-    df = df.groupby(['Sold Date']).agg(
+    df = df.groupby('Sold Date', sort=False).agg(
             {'Total Price'    : 'sum', 'Quantity': 'sum', 'eBay Profits': 'sum', 'PayPal Profits': 'sum',
              'Scalper Profits': 'sum'})
 
     df['Sold Date'] = df.index
 
-    df['Cum Sales'] = df['Total Price'].cumsum()
-    df['Cum Quantity'] = df['Quantity'].cumsum()
-    df['Cum eBay'] = df['eBay Profits'].cumsum()
-    df['Cum PayPal'] = df['PayPal Profits'].cumsum()
-    df['Cum Scalper'] = df['Scalper Profits'].cumsum()
+    cum_totals = df[['Total Price', 'Quantity', 'eBay Profits', 'PayPal Profits', 'Scalper Profits']].to_numpy(
+            dtype=np.float64, copy=True)
+    np.cumsum(cum_totals, axis=0, out=cum_totals)
+    df[['Cum Sales', 'Cum Quantity', 'Cum eBay', 'Cum PayPal', 'Cum Scalper']] = cum_totals
+
+    fig, (ax1, ax2) = _get_fig('plot_profits', figsize=(10, 5), ncols=2, tight_layout=True)
 
-    fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(10, 5), tight_layout=True)
+    # Convert the date axis once rather than having every plot call re-infer the units of a pandas Series
+    sold_dates = df['Sold Date'].to_numpy(dtype='datetime64[D]')
+    ax1.xaxis_date()
+    ax1.set_xmargin(0)
+    ax2.xaxis_date()
+    ax2.set_xmargin(0)
 
-    ax1.plot(df['Sold Date'], df['Cum Sales'], color='red', label='Cumulative Sales')
-    ax1.plot(df['Sold Date'], df['Cum Scalper'], color='purple', label='Cumulative Scalper Profits')
-    ax1.plot(df['Sold Date'], df['Cum eBay'], color='crimson', label='Cumulative eBay Profits')
-    ax1.plot(df['Sold Date'], df['Cum PayPal'], color='deeppink', label='Cumulative PayPal Profits')
+    ax1.plot(sold_dates, df['Cum Sales'].to_numpy(), color='red', label='Cumulative Sales')
+    ax1.plot(sold_dates, df['Cum Scalper'].to_numpy(), color='purple', label='Cumulative Scalper Profits')
+    ax1.plot(sold_dates, df['Cum eBay'].to_numpy(), color='crimson', label='Cumulative eBay Profits')
+    ax1.plot(sold_dates, df['Cum PayPal'].to_numpy(), color='deeppink', label='Cumulative PayPal Profits')
 
     ax1.set_ylabel('', color='r')
     ax1.tick_params('y', colors='r')
@@ -271,7 +510,7 @@ def plot_profits(df: pd.DataFrame,
     ax1.set_xlabel("Sold Date")
 
     ax1_2 = ax1.twinx()
-    ax1_2.plot(df['Sold Date'], df['Cum Quantity'], color='blue', label='Cumulative Quantity')
+    ax1_2.plot(sold_dates, df['Cum Quantity'].to_numpy(), color='blue', label='Cumulative Quantity')
     ax1_2.set_ylabel('Quantity Sold', color='blue')
     ax1_2.tick_params('y', colors='b')
     ax1_2.set_ylim(bottom=0)
@@ -282,8 +521,8 @@ def plot_profits(df: pd.DataFrame,
     lines2, labels2 = ax1_2.get_legend_handles_labels()
     ax1.legend(lines + lines2, labels + labels2)
 
-    ax2.plot(df['Sold Date'], df['Total Price'], color='red', label=f'Total Sales ({e_vars.ccode})')
-    ax2.plot(df['Sold Date'], df['Scalper Profits'], '-', color='darkred', label='Scalper Profits')
+    ax2.plot(sold_dates, df['Total Price'].to_numpy(), color='red', label=f'Total Sales ({e_vars.ccode})')
+    ax2.plot(sold_dates, df['Scalper Profits'].to_numpy(), '-', color='darkred', label='Scalper Profits')
 
     ax2.tick_params(axis='y', colors='red')
     ax2.tick_params(axis='x', rotation=30)
@@ -291,7 +530,7 @@ def plot_profits(df: pd.DataFrame,
     ax2.set_ylabel(f"Sales/Profits ({e_vars.ccode})", color='r')
 
     ax2_2 = ax2.twinx()
-    ax2_2.plot(med_price, color='black', label='Median % of MSRP')
+    ax2_2.plot(sold_dates, med_price.to_numpy(), color='black', label='Median % of MSRP')
     ax2_2.set_ylabel("Median % of MSRP")
     ax2_2.set_ylim(bottom=100)
     ax2_2.grid(False)
@@ -305,9 +544,10 @@ def plot_profits(df: pd.DataFrame,
     plt.subplots_adjust(top=0.45)
     plt.gcf().text(0.9, 0.01, '@driscoll42', fontsize=9)
 
-    plt.savefig('Images/' + title + ' Cumulative Plots')
+    plt.savefig('Images/' + title + ' Cumulative Plots', **_SAVE_KW)
 
     if e_vars.show_plots and e_vars.profit_plot: plt.show()
+    fig.clf(keep_observers=True)
 
     return df['Cum eBay'].iloc[-1], df['Cum PayPal'].iloc[-1], df['Cum Scalper'].iloc[-1]
 
@@ -332,27 +572,25 @@ def median_plotting(dfs: List[pd.DataFrame],
     -------
 
     """
-    dfs = deepcopy(dfs)
+    dfs = [prep_df(df) for df in dfs]
     if len(colors) < 1:
-        colors = ['#000000', '#7f0000', '#808000', '#008080', '#000080', '#ff8c00', '#2f4f4f', '#00ff00', '#0000ff',
-                  '#ff00ff', '#6495ed', '#ff1493', '#98fb98', '#ffdab9']
+        colors = _COLORS_DEFAULT
+    color_idxs = [i % len(colors) for i in range(len(dfs))]
 
-    plt.figure()  # In this example, all the plots will be in one figure. figsize=(15, 12)
+    fig, _ = _get_fig('median_plotting % MSRP')
     plt.ylabel("% of MSRP")
     plt.xlabel("Sale Date")
     plt.tick_params(axis='y')
     plt.tick_params(axis='x', rotation=30)
     linewidth = 1.5
     for i, df in enumerate(dfs):
-        color = i % len(colors)
+        color = color_idxs[i]
 
-        df = prep_df(df)
-
-        med_price_scaled = df.groupby(['Sold Date'])['Total Price'].median() / df['msrp'].iloc[0] * 100
+        med_price_scaled = df.groupby('Sold Date', sort=False)['Total Price'].median() / df['msrp'].iloc[0] * 100
         # med_mad = robust.mad(df.groupby(['Sold Date'])['Total Price']/ msrps[i] * 100)
 
         if roll > 0:
-            med_price_scaled = med_price_scaled.rolling(roll, min_periods=1).mean()
+            med_price_scaled = _rolling_stat(med_price_scaled, roll)
             linewidth = 2.5
 
         min_msrp = min(min_msrp, min(med_price_scaled))
@@ -368,16 +606,16 @@ def median_plotting(dfs: List[pd.DataFrame],
 
     if roll > 0:
         plt.title(f"{title} {roll} Day Rolling Average - % MSRP")
-        plt.savefig(f"Images/{title} {roll} Day Rolling Average - % MSRP")
+        plt.savefig(f"Images/{title} {roll} Day Rolling Average - % MSRP", **_SAVE_KW)
     else:
         plt.title(f"{title} - % MSRP")
-        plt.savefig(f"Images/{title} - % MSRP")
+        plt.savefig(f"Images/{title} - % MSRP", **_SAVE_KW)
 
     if e_vars.show_plots: plt.show()
+    fig.clf(keep_observers=True)
 
     # Plotting the non-scaled graph
-    plt.figure()  # In this example, all the plots will be in one figure.
-    fig, ax1 = plt.subplots()
+    fig, ax1 = _get_fig('median_plotting price')
     plt.ylabel(f"Median Sale Price ({e_vars.ccode})")
     plt.xlabel("Sale Date")
     plt.tick_params(axis='y')
@@ -385,12 +623,12 @@ def median_plotting(dfs: List[pd.DataFrame],
     linewidth = 1.5
 
     for i, df in enumerate(dfs):
-        color = i % len(colors)
+        color = color_idxs[i]
 
-        med_price = df.groupby(['Sold Date'])['Total Price'].median()
+        med_price = df.groupby('Sold Date', sort=False)['Total Price'].median()
 
         if roll > 0:
-            med_price = med_price.rolling(roll, min_periods=1).mean()
+            med_price = _rolling_stat(med_price, roll)
             linewidth = 2.5
 
         min_msrp = min(min_msrp, min(med_price))
@@ -405,11 +643,12 @@ def median_plotting(dfs: List[pd.DataFrame],
     plt.gcf().text(0.85, 0.01, '@driscoll42', fontsize=9)
     if roll > 0:
         plt.title(f"{title} {roll} Day Rolling Average - {e_vars.ccode}")
-        plt.savefig(f"Images/{title} {roll} Day Rolling Average - {e_vars.ccode}")
+        plt.savefig(f"Images/{title} {roll} Day Rolling Average - {e_vars.ccode}", **_SAVE_KW)
     else:
         plt.title(f"{title} - {e_vars.ccode}")
-        plt.savefig(f"Images/{title} - {e_vars.ccode}")
+        plt.savefig(f"Images/{title} - {e_vars.ccode}", **_SAVE_KW)
     if e_vars.show_plots: plt.show()
+    fig.clf(keep_observers=True)
 
 
 def mean_plotting(dfs: List[pd.DataFrame],
@@ -432,28 +671,24 @@ def mean_plotting(dfs: List[pd.DataFrame],
     -------
 
     """
-    dfs = deepcopy(dfs)
-    colors = ['#000000', '#7f0000', '#808000', '#008080', '#000080', '#ff8c00', '#2f4f4f', '#00ff00', '#0000ff',
-              '#ff00ff', '#6495ed', '#ff1493', '#98fb98', '#ffdab9']
-    colors = ['#ED2939', '#FF2400', '#CD5C5C', '#7C0A02', '#0B6623', '#708238', '#3F704D', '#8F9779', '#00755E',
-              '#004B49', '#6495ed', '#ff1493', '#98fb98', '#ffdab9']
-    # colors = ['blue', 'darkblue', 'green', 'lime', 'lime']
-    plt.figure()  # In this example, all the plots will be in one figure. figsize=(15, 12)
+    dfs = [prep_df(df) for df in dfs]
+    colors = _COLORS_MEAN
+    color_idxs = [i % (len(colors) - 1) for i in range(len(dfs))]
+    fig, _ = _get_fig('mean_plotting % MSRP')
     plt.ylabel("% of MSRP")
     plt.xlabel("Sale Date")
     plt.tick_params(axis='y')
     plt.tick_params(axis='x', rotation=30)
     for i, df in enumerate(dfs):
-        color = i % (len(colors) - 1)
+        color = color_idxs[i]
 
-        df = prep_df(df)
-        med_price_scaled = df.groupby(['Sold Date'])['Total Price'].mean() / df['msrp'].iloc[0] * 100
+        agg_prices = df.groupby('Sold Date', sort=False)['Total Price'].agg(['mean', 'std']) / df['msrp'].iloc[0] * 100
+        med_price_scaled, stdev_scaled = agg_prices['mean'], agg_prices['std']
         # med_mad = robust.mad(df.groupby(['Sold Date'])['Total Price']/ msrps[i] * 100)
-        stdev_scaled = df.groupby(['Sold Date'])['Total Price'].std() / df['msrp'].iloc[0] * 100
 
         if roll > 0:
-            stdev_scaled = med_price_scaled.rolling(roll, min_periods=1).std()
-            med_price_scaled = med_price_scaled.rolling(roll, min_periods=1).mean()
+            stdev_scaled = _rolling_stat(med_price_scaled, roll, 'std')
+            med_price_scaled = _rolling_stat(med_price_scaled, roll)
 
         min_msrp = min(min_msrp, min(med_price_scaled))
         plt.plot(med_price_scaled, colors[color], label=df['item'].iloc[0])
@@ -472,30 +707,30 @@ def mean_plotting(dfs: List[pd.DataFrame],
 
     if roll > 0:
         plt.title(f"{title} {roll} Day Rolling Average - % MSRP")
-        plt.savefig(f"Images/{title} {roll} Day Rolling Average - % MSRP")
+        plt.savefig(f"Images/{title} {roll} Day Rolling Average - % MSRP", **_SAVE_KW)
     else:
         plt.title(f"{title} - % MSRP")
-        plt.savefig(f"Images/{title} - % MSRP")
+        plt.savefig(f"Images/{title} - % MSRP", **_SAVE_KW)
 
     if e_vars.show_plots: plt.show()
+    fig.clf(keep_observers=True)
 
     # Plotting the non-scaled graph
-    plt.figure()  # In this example, all the plots will be in one figure.
-    fig, ax1 = plt.subplots()
+    fig, ax1 = _get_fig('mean_plotting price')
     plt.ylabel(f"Median Sale Price ({e_vars.ccode})")
     plt.xlabel("Sale Date")
     plt.tick_params(axis='y')
     plt.tick_params(axis='x', rotation=30)
 
     for i, df in enumerate(dfs):
-        color = i % (len(colors) - 1)
+        color = color_idxs[i]
 
-        med_price = df.groupby(['Sold Date'])['Total Price'].mean()
-        std_price = df.groupby(['Sold Date'])['Total Price'].std()
+        agg_prices = df.groupby('Sold Date', sort=False)['Total Price'].agg(['mean', 'std'])
+        med_price, std_price = agg_prices['mean'], agg_prices['std']
 
         if roll > 0:
-            std_price = med_price.rolling(roll, min_periods=1).std()
-            med_price = med_price.rolling(roll, min_periods=1).mean()
+            std_price = _rolling_stat(med_price, roll, 'std')
+            med_price = _rolling_stat(med_price, roll)
 
         min_msrp = min(min_msrp, min(med_price))
         plt.plot(med_price, colors[color], label=df['item'].iloc[0])
@@ -513,11 +748,12 @@ def mean_plotting(dfs: List[pd.DataFrame],
     plt.gcf().text(0.85, 0.01, '@driscoll42', fontsize=9)
     if roll > 0:
         plt.title(f"{title} {roll} Day Rolling Average - {e_vars.ccode}")
-        plt.savefig(f"Images/{title} {roll} Day Rolling Average - {e_vars.ccode}")
+        plt.savefig(f"Images/{title} {roll} Day Rolling Average - {e_vars.ccode}", **_SAVE_KW)
     else:
         plt.title(f"{title} - {e_vars.ccode}")
-        plt.savefig(f"Images/{title} - {e_vars.ccode}")
+        plt.savefig(f"Images/{title} - {e_vars.ccode}", **_SAVE_KW)
     if e_vars.show_plots: plt.show()
+    fig.clf(keep_observers=True)
 
 
 def crpyto_comp_plotting(dfs: List[pd.DataFrame],
@@ -542,7 +778,7 @@ def crpyto_comp_plotting(dfs: List[pd.DataFrame],
     -------
 
     """
-    dfs = deepcopy(dfs)
+    dfs = [prep_df(df) for df in dfs]
 
     min_date = datetime.now()
     max_date = datetime.now() - timedelta(365)
@@ -562,48 +798,35 @@ def crpyto_comp_plotting(dfs: List[pd.DataFrame],
 
     # Etherium Pricing
     # print(min_date, max_date)
-    eth_crypto_full = get_crypto_data("ETH/USDT", min_date, max_date)
+    eth_crypto_full = _crypto_prices("ETH/USDT", min_date, max_date)
     eth_crypto_full = eth_crypto_full.close
     eth_prices = eth_crypto_full.div(eth_crypto_full[0])
     # eth_prices = eth_prices.mul(100)
 
     # Bitcoin Pricing
-    btc_crypto = get_crypto_data("BTC/USDT", min_date, max_date)
+    btc_crypto = _crypto_prices("BTC/USDT", min_date, max_date)
     btc_prices = btc_crypto.close
     btc_prices = btc_prices.div(btc_prices[0])
     btc_prices = btc_prices.mul(100)
 
-    colors = ['#000000', '#7f0000', '#808000', '#008080', '#000080', '#ff8c00', '#2f4f4f', '#00ff00', '#0000ff',
-              '#ff00ff', '#6495ed', '#ff1493', '#98fb98', '#ffdab9']
-    plt.figure()  # In this example, all the plots will be in one figure.
+    colors = _COLORS_DEFAULT
+    color_idxs = [i % (len(colors) - 1) for i in range(len(dfs))]
+    fig, _ = _get_fig('crpyto_comp_plotting crypto')
     plt.ylabel("GPU: Price/hashrate - ETH: Price")
     plt.xlabel("Sale Date")
     plt.tick_params(axis='y')
     plt.tick_params(axis='x', rotation=30)
 
     for i, df in enumerate(dfs):
-        color = i % (len(colors) - 1)
+        color = color_idxs[i]
 
-        df = prep_df(df)
         df = df[df['Sold Date'] >= start_date]
         df = df[df['Sold Date'] <= end_date]
 
-        hash_rate = 1
-        # Source https://cryptoage.com/en/2380-the-current-table-with-the-hash-rate-of-videocards-for-2021.html
-        if '3060 Ti' in df['item'].iloc[0]:
-            hash_rate = 59
-        elif '3060' in df['item'].iloc[0]:
-            hash_rate = 37.5
-        elif '3070' in df['item'].iloc[0]:
-            hash_rate = 59
-        elif '3080 Ti' in df['item'].iloc[0]:
-            hash_rate = 64
-        elif '3080' in df['item'].iloc[0]:
-            hash_rate = 100
-        elif '3090' in df['item'].iloc[0]:
-            hash_rate = 111
-
-        med_prices = df.groupby(['Sold Date'])['Total Price'].median() / hash_rate / eth_prices
+        hash_match = _HASH_RE.search(df['item'].iloc[0])
+        hash_rate = _HASH_RATES.get(hash_match.group(1), 1) if hash_match else 1
+
+        med_prices = df.groupby('Sold Date', sort=False)['Total Price'].median() / hash_rate / eth_prices
 
         # med_prices = 100 * med_prices / med_prices[0]
         # print(df['item'].iloc[0], 'R Squared:', r2_score(eth_prices[-(len(med_price_scaled)):], med_price_scaled))
@@ -629,15 +852,15 @@ def crpyto_comp_plotting(dfs: List[pd.DataFrame],
 
     if roll > 0:
         plt.title(f"{title} {roll} Day Rolling Average - % MSRP")
-        plt.savefig(f"Images/{title} {roll} Day Rolling Average - % MSRP")
+        plt.savefig(f"Images/{title} {roll} Day Rolling Average - % MSRP", **_SAVE_KW)
     else:
         plt.title(f"{title} - % MSRP")
-        plt.savefig(f"Images/{title} - % MSRP")
+        plt.savefig(f"Images/{title} - % MSRP", **_SAVE_KW)
     if e_vars.show_plots: plt.show()
+    fig.clf(keep_observers=True)
 
     # Plotting the non-scaled graph
-    plt.figure()  # In this example, all the plots will be in one figure.
-    fig, ax1 = plt.subplots()
+    fig, ax1 = _get_fig('crpyto_comp_plotting price')
     plt.ylabel(f"Median Sale Price ({e_vars.ccode})")
     plt.xlabel("Sale Date")
     plt.tick_params(axis='y')
@@ -647,10 +870,10 @@ def crpyto_comp_plotting(dfs: List[pd.DataFrame],
     else:
         plt.title(f"{title} - {e_vars.ccode}")
     for i, df in enumerate(dfs):
-        color = i % (len(colors) - 1)
+        color = color_idxs[i]
         df = df[df['Sold Date'] >= datetime(2021, 1, 1)]
 
-        med_price = df.groupby(['Sold Date'])['Total Price'].median()
+        med_price = df.groupby('Sold Date', sort=False)['Total Price'].median()
 
         if roll > 0:
             med_price = med_price.rolling(roll, min_periods=1).mean()
@@ -665,6 +888,7 @@ def crpyto_comp_plotting(dfs: List[pd.DataFrame],
     # plt.savefig(f"Images/{title} - {e_vars.ccode}")
     # if e_vars.show_plots: plt.show()
     plt.show()
+    fig.clf(keep_observers=True)
 
 
 # https://tylermarrs.com/posts/pareto-plot-with-matplotlib/
@@ -698,9 +922,7 @@ def pareto_plot(df: pd.DataFrame,
     weights = df3[y_label] / df3[y_label].sum()
     cumsum = weights.cumsum()
 
-    plt.figure(figsize=(8, 8))
-
-    fig, ax1 = plt.subplots()
+    fig, ax1 = _get_fig('pareto_plot')
 
     ax1.set_xlabel(x_label)
     ax1.set_ylabel(y_label)
@@ -717,12 +939,17 @@ def pareto_plot(df: pd.DataFrame,
     ax2.set_ylim(bottom=0)
     ax2.plot(df3[x_label], cumsum, '-ro', alpha=0.5)
 
-    vals = ax2.get_yticks()
-    ax2.set_yticklabels(['{:,.2%}'.format(x) for x in vals])
-
-    formatted_weights = ['{0:.0%}'.format(x) for x in cumsum]
-    for i, txt in enumerate(formatted_weights):
-        ax2.annotate(txt, (df[x_label][i], cumsum[i]), fontweight='heavy')
+    ax2.yaxis.set_major_formatter(ticker.PercentFormatter(1.0, decimals=2))
+
+    x_vals = df[x_label].to_numpy()
+    cum_vals = cumsum.to_numpy()
+    # Quantities summing to 0 leave a NaN cumsum, which has no integer percent, those keep the format's 'nan%'
+    finite = np.isfinite(cum_vals)
+    percents = np.rint(np.where(finite, cum_vals, 0) * 100).astype(np.int64)
+    formatted_weights = np.char.mod('%d%%', percents).astype(object)
+    formatted_weights[~finite] = ['{0:.0%}'.format(cum_val) for cum_val in cum_vals[~finite]]
+    for x_val, cum_val, txt in zip(x_vals, cum_vals, formatted_weights):
+        ax2.annotate(txt, (x_val, cum_val), fontweight='heavy')
     ax2.grid(False)
 
     plt.title(title)
@@ -730,8 +957,9 @@ def pareto_plot(df: pd.DataFrame,
 
     fig.tight_layout()
 
-    plt.savefig('Images/' + title)
+    plt.savefig('Images/' + title, **_SAVE_KW)
     if e_vars.show_plots: plt.show()
+    fig.clf(keep_observers=True)
 
 
 def ebay_seller_plot(dfs: List[pd.DataFrame],
@@ -749,37 +977,26 @@ def ebay_seller_plot(dfs: List[pd.DataFrame],
     -------
 
     """
-    df = pd.concat(dfs)
-    # eBay Seller Feedback vs Quantity Sold
-
-    df_sell = df[df['Seller'] != 'None']
-    df_sell = df_sell[df_sell['Seller Feedback'] != 'None']
+    df = pd.concat(dfs, copy=False, ignore_index=True)
+    # Seller is grouped on three times below, categorize it once so each groupby works off the integer codes
+    df['Seller'] = df['Seller'].astype('category')
+    df_quant = df.loc[(df['Seller'] != 'None').to_numpy()]
+    del df
 
-    df_sell['Seller Feedback'] = pd.to_numeric(df_sell['Seller Feedback'])
+    # eBay Seller Feedback vs Quantity Sold
+    df_sell = df_quant.loc[df_quant['Seller Feedback'] != 'None'].copy()
+    df_sell['Seller Feedback'] = pd.to_numeric(df_sell['Seller Feedback'], downcast='integer')
 
     df_stores = df_sell[df_sell['Store'] == 1]
     df_nostores = df_sell[df_sell['Store'] == 0]
 
     def split_data(df_sell):
-        # https://blog.edesk.com/resources/ebay-star-ratings/
-        zero_fb = df_sell[df_sell['Seller Feedback'] == 0]['Quantity'].sum()
-        no_star = df_sell[(df_sell['Seller Feedback'] > 0) & (df_sell['Seller Feedback'] < 10)]['Quantity'].sum()
-        yellow_star = df_sell[(df_sell['Seller Feedback'] >= 10) & (df_sell['Seller Feedback'] < 50)]['Quantity'].sum()
-        blue_star = df_sell[(df_sell['Seller Feedback'] >= 50) & (df_sell['Seller Feedback'] < 100)]['Quantity'].sum()
-        turquoise_star = df_sell[(df_sell['Seller Feedback'] >= 100) & (df_sell['Seller Feedback'] < 500)][
-            'Quantity'].sum()
-        purple_star = df_sell[(df_sell['Seller Feedback'] >= 500) & (df_sell['Seller Feedback'] < 1000)][
-            'Quantity'].sum()
-        red_star = df_sell[(df_sell['Seller Feedback'] >= 1000) & (df_sell['Seller Feedback'] < 5000)]['Quantity'].sum()
-        green_star = df_sell[(df_sell['Seller Feedback'] >= 5000) & (df_sell['Seller Feedback'] < 10000)][
-            'Quantity'].sum()
-        shooting_star = df_sell[(df_sell['Seller Feedback'] >= 10000)]['Quantity'].sum()
+        star_category = pd.cut(df_sell['Seller Feedback'], bins=_FEEDBACK_BINS, labels=_FEEDBACK_LABELS, right=False)
+        quantity_sold = df_sell.groupby(star_category, observed=False)['Quantity'].sum()
 
         df_fb = pd.DataFrame({
-            'Star Category': ['Zero FB', '1 - 9', '10 - 49', '50 - 99', '100 - 499', '500 - 999', '1000 - 4999',
-                              '5000 - 9999', '10000+'],
-            'Quantity Sold': [zero_fb, no_star, yellow_star, blue_star, turquoise_star, purple_star, red_star,
-                              green_star, shooting_star]})
+            'Star Category': _FEEDBACK_LABELS,
+            'Quantity Sold': quantity_sold.reindex(_FEEDBACK_LABELS, fill_value=0).to_numpy()})
         return df_fb
 
     df_store_fb = split_data(df_stores)
@@ -791,31 +1008,27 @@ def ebay_seller_plot(dfs: List[pd.DataFrame],
 
     pareto_plot(df_nostores_fb, df_store_fb, df_all, e_vars=e_vars, df_name='Non-Store', df2_name='Store',
                 x_label='Star Category', y_label='Quantity Sold', title=title)
+    # Only df_quant is needed from here on, the feedback frames would otherwise stay alive until the function returns
+    del df_sell, df_stores, df_nostores, df_store_fb, df_nostores_fb, df_all
 
     # eBay Seller Sales vs Total Sold
 
-    df_quant = df[df['Seller'] != 'None']
-
-    df_stores = df_quant[df_sell['Store'] == 1]
-    df_nostores = df_quant[df_sell['Store'] == 0]
+    df_stores = df_quant[df_quant['Store'] == 1]
+    df_nostores = df_quant[df_quant['Store'] == 0]
 
     def split_data_again(df_quant):
-        df_quant = df_quant.groupby(['Seller'])['Quantity'].sum().reset_index()
-
-        one_sale = df_quant[df_quant['Quantity'] == 1]['Quantity'].sum()
-        two_sales = df_quant[(df_quant['Quantity'] == 2)]['Quantity'].sum()
-        three_sales = df_quant[(df_quant['Quantity'] == 3)]['Quantity'].sum()
-        four_sales = df_quant[(df_quant['Quantity'] == 4)]['Quantity'].sum()
-        five_sales = df_quant[(df_quant['Quantity'] == 5)]['Quantity'].sum()
-        five_ten = df_quant[(df_quant['Quantity'] >= 6) & (df_quant['Quantity'] < 10)]['Quantity'].sum()
-        eleven_twenty = df_quant[(df_quant['Quantity'] >= 11) & (df_quant['Quantity'] < 20)]['Quantity'].sum()
-        twen_fifty = df_quant[(df_quant['Quantity'] >= 21) & (df_quant['Quantity'] < 50)]['Quantity'].sum()
-        fifty_plus = df_quant[(df_quant['Quantity'] >= 50)]['Quantity'].sum()
+        seller_sales = df_quant.groupby('Seller', observed=True, sort=False)['Quantity'].sum()
+
+        sales = seller_sales.to_numpy()
+        if bucket_sum is not None:
+            quantity_sold = bucket_sum(np.ascontiguousarray(sales, dtype=np.int64), _SALES_BINS)
+        else:
+            sales = sales[sales > 0]
+            quantity_sold = np.bincount(np.digitize(sales, _SALES_BINS), weights=sales, minlength=len(_SALES_LABELS))
 
         df_fb = pd.DataFrame({
-            'Number of Sales': ['1', '2', '3', '4', '5', '6 - 10', '11 - 20', '21 - 50', '50 +'],
-            'Quantity Sold'  : [one_sale, two_sales, three_sales, four_sales, five_sales, five_ten, eleven_twenty,
-                                twen_fifty, fifty_plus]})
+            'Number of Sales': _SALES_LABELS,
+            'Quantity Sold'  : quantity_sold.astype(np.int64)})
         return df_fb
 
     title = title_text.replace("+", " ").split('-', 1)[
@@ -832,7 +1045,8 @@ def ebay_seller_plot(dfs: List[pd.DataFrame],
 def brand_plot(dfs: List[pd.DataFrame],
                title: str,
                e_vars: EbayVariables,
-               roll: int = 0) -> None:
+               roll: Union[int, List[int]] = 0,
+               rolling_stat: str = 'mean') -> None:
     """
 
     Parameters
@@ -840,69 +1054,66 @@ def brand_plot(dfs: List[pd.DataFrame],
     dfs :
     title :
     e_vars :
-    roll :
+    roll : Days to roll over, or a list of them to make one plot for each while only prepping the frames once
+    rolling_stat : Either 'mean' or 'median', how the daily medians are rolled when roll > 0
 
     Returns
     -------
 
     """
-    dfs = deepcopy(dfs)
     pd.set_option('display.max_columns', None)
 
-    for i, df in enumerate(dfs):
-        df = prep_df(df)
-        for brand in e_vars.brand_list:
-            temp_brand = df[(df['Brand'] == brand)]
-            if len(temp_brand) > 0:
-                print(df.item.iloc[0], brand, len(temp_brand), round(temp_brand['Total Price'].mean()),
-                      round(temp_brand['Total Price'].sum()))
-        df['Total Price'] /= df['msrp']
-        dfs[i] = df
-
-    df = pd.concat(dfs)
-    brand_dict = {}
-    for brand in e_vars.brand_list:
-        brand_dict[brand] = df[(df['Brand'] == brand)]
-
-    # Picked using this https://mokole.com/palette.html
-    colors = ['#000000', '#7f0000', '#808000', '#008080', '#000080', '#ff8c00', '#2f4f4f', '#00ff00', '#0000ff',
-              '#ff00ff', '#6495ed', '#ff1493', '#98fb98', '#ffdab9']
-    min_msrp = 100
-    max_msrp = 300
-    plt.figure(figsize=(12, 8))  # In this example, all the plots will be in one figure.
-    plt.ylabel("% of MSRP")
-    plt.xlabel("Sale Date")
-    plt.tick_params(axis='y')
-    plt.tick_params(axis='x', rotation=30)
-
-    if roll > 0:
-        plt.title(f"{title} {roll} Day Rolling Average")
-    else:
-        plt.title(title)
-
-    for i, brand in enumerate(e_vars.brand_list):
-        color = i % (len(colors) - 1)
+    df = _prep_brand_frames(dfs, e_vars.brand_list, print_stats=e_vars.debug)
+    # Brands with 10 or fewer sales aren't plotted, so they're left out of the grouping entirely
+    brand_counts = df['Brand'].value_counts(sort=False)
+    plot_brands = brand_counts.index[brand_counts.to_numpy() > 10]
+
+    # prep_df already repeated every row by its Quantity, so the medians are quantity weighted as is. One grouping pass
+    # for every brand, with a column of daily medians per brand
+    df = df[df['Brand'].isin(plot_brands)]
+    med_prices = df.groupby(['Brand', 'Sold Date'], observed=True)['Total Price'].median()
+    # Scaled to percents here, on the daily medians rather than on every row
+    med_prices = med_prices.unstack('Brand') * 100.0
+
+    colors = _COLORS_DEFAULT
+    roll_name = 'Median' if rolling_stat == 'median' else 'Average'
+    rolls = roll if isinstance(roll, list) else [roll]
+    for roll in rolls:  # pylint: disable=redefined-argument-from-local
+        min_msrp = 100
+        max_msrp = 300
+        fig, ax1 = _get_fig('brand_plot', figsize=(12, 8))
+        plt.ylabel("% of MSRP")
+        plt.xlabel("Sale Date")
+        plt.tick_params(axis='y')
+        plt.tick_params(axis='x', rotation=30)
 
-        if len(brand_dict[brand]) > 10:
-            print(brand, len(brand_dict[brand]))
+        if roll > 0:
+            plt.title(f"{title} {roll} Day Rolling {roll_name}")
+        else:
+            plt.title(title)
+        # Matplotlib cycles through the colors for each plotted brand, starting over after the last one
+        ax1.set_prop_cycle(color=colors)
 
-            brand_dict[brand] = brand_dict[brand][brand_dict[brand]['Total Price'] > 0]
-            brand_dict[brand] = brand_dict[brand].loc[brand_dict[brand].index.repeat(brand_dict[brand]['Quantity'])]
-            brand_dict[brand]['Quantity'] = 1
+        for brand in e_vars.brand_list:
+            if brand_counts.get(brand, 0) <= 10 or brand not in med_prices:
+                continue
+            print(brand, brand_counts[brand])
 
-            med_price = brand_dict[brand].groupby(['Sold Date'])['Total Price'].median() * 100.0
+            med_price = med_prices[brand].dropna()
             if roll > 0:
-                med_price = med_price.rolling(roll, min_periods=1).mean()
-
-            min_msrp = min(100, min(med_price))
-            max_msrp = max(300, max(med_price))
-            plt.plot(med_price, colors[color], label=e_vars.brand_list[i])
-    plt.ylim(bottom=min_msrp, top=max_msrp)
-    plt.legend()
-    plt.tight_layout()
-    if roll > 0:
-        plt.savefig(f"Images/{title} {roll} Day Rolling Average")
-    else:
-        plt.savefig(f"Images/{title}")
+                med_price = _rolling_stat(med_price, roll, rolling_stat)
+
+            med_arr = med_price.to_numpy()
+            min_msrp = min(min_msrp, med_arr.min())
+            max_msrp = max(max_msrp, med_arr.max())
+            plt.plot(med_price, label=brand)
+        plt.ylim(bottom=min_msrp, top=max_msrp)
+        plt.legend()
+        plt.tight_layout()
+        if roll > 0:
+            plt.savefig(f"Images/{title} {roll} Day Rolling {roll_name}", **_SAVE_KW)
+        else:
+            plt.savefig(f"Images/{title}", **_SAVE_KW)
 
-    if e_vars.show_plots: plt.show()
+        if e_vars.show_plots: plt.show()
+        fig.clf(keep_observers=True)
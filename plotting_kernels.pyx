@@ -0,0 +1,148 @@
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True
+"""
+plotting_kernels.pyx
+
+Optional compiled kernels for plotting.py. plotting.py falls back to NumPy when this module has not been built.
+
+Build in place with:
+    python setup.py build_ext --inplace
+
+Current functions:
+    fit_eval - Fits a polynomial trendline, evaluates it, and computes its R squared in typed loops
+    bucket_sum - Sums values into the buckets given by their lower edges in a single pass
+"""
+
+import numpy as np
+
+
+cdef inline double _horner(double[::1] coefs, Py_ssize_t terms, double x_val) nogil:
+    cdef double acc = 0.0
+    cdef Py_ssize_t j
+    for j in range(terms - 1, -1, -1):
+        acc = acc * x_val + coefs[j]
+    return acc
+
+
+def fit_eval(const double[::1] x,
+             const double[::1] y,
+             int degree,
+             const double[::1] x_future):
+    """
+    Least squares polynomial fit via the normal equations, evaluated with Horner's method at x_future and x
+
+    Parameters
+    ----------
+    x : Day offsets of the observed values
+    y : Observed values
+    degree : Degree of the polynomial
+    x_future : Day offsets to evaluate the trendline at for plotting
+
+    Returns
+    -------
+    The polynomial coefficients (lowest order first, like numpy.polynomial), the trendline evaluated at x_future, and
+    the R squared of the fit against y. Raises numpy.linalg.LinAlgError if there are no more points than degree or the
+    normal equations are ill conditioned, so the caller can fall back to numpy.polynomial.polyfit and its RankWarning
+
+    """
+    cdef Py_ssize_t n = x.shape[0]
+    cdef Py_ssize_t n_future = x_future.shape[0]
+    cdef Py_ssize_t terms = degree + 1
+    cdef Py_ssize_t i, j, k
+    cdef double scale = 0.0
+    cdef double x_scaled, x_pow, resid
+    cdef double mean_y = 0.0
+    cdef double ss_res = 0.0
+    cdef double ss_tot = 0.0
+
+    # Too few points to pin down every coefficient, solve would return one of infinitely many fits without complaint
+    if n <= degree:
+        raise np.linalg.LinAlgError('Fewer points than coefficients')
+
+    # Scale x into [-1, 1] so the normal equations stay well conditioned for the higher degrees
+    for i in range(n):
+        if abs(x[i]) > scale:
+            scale = abs(x[i])
+    if scale == 0.0:
+        scale = 1.0
+
+    # Power sums of x for the normal matrix and the x^k * y moments for the right hand side, in a single pass
+    power_sums = np.zeros(2 * degree + 1)
+    moments = np.zeros(terms)
+    cdef double[::1] ps = power_sums
+    cdef double[::1] mo = moments
+    for i in range(n):
+        x_scaled = x[i] / scale
+        x_pow = 1.0
+        for k in range(2 * degree + 1):
+            ps[k] += x_pow
+            if k < terms:
+                mo[k] += x_pow * y[i]
+            x_pow *= x_scaled
+        mean_y += y[i]
+    mean_y /= n
+
+    normal = np.empty((terms, terms))
+    cdef double[:, ::1] nm = normal
+    for j in range(terms):
+        for k in range(terms):
+            nm[j, k] = ps[j + k]
+
+    # The normal matrix squares the condition number of the Vandermonde matrix, beyond this polyfit's lstsq is the
+    # accurate choice
+    if np.linalg.cond(normal) > 1e12:
+        raise np.linalg.LinAlgError('Ill conditioned normal equations')
+    coefs = np.linalg.solve(normal, moments)
+    cdef double[::1] cf = coefs
+
+    # Back to coefficients of the unscaled x
+    x_pow = 1.0
+    for j in range(terms):
+        cf[j] /= x_pow
+        x_pow *= scale
+
+    ffit = np.empty(n_future)
+    cdef double[::1] ff = ffit
+    for i in range(n_future):
+        ff[i] = _horner(cf, terms, x_future[i])
+
+    for i in range(n):
+        resid = y[i] - _horner(cf, terms, x[i])
+        ss_res += resid * resid
+        ss_tot += (y[i] - mean_y) * (y[i] - mean_y)
+
+    r_squared = 1.0 - ss_res / ss_tot if ss_tot > 0 else 1.0
+    return coefs, ffit, r_squared
+
+
+def bucket_sum(const long long[::1] values,
+               const long long[::1] lower_edges):
+    """
+    Same as np.bincount(np.digitize(values, lower_edges), weights=values, minlength=len(lower_edges) + 1) for positive
+    values, without the intermediate index array. Values <= 0 are skipped
+
+    Parameters
+    ----------
+    values : Values to bucket, also used as the weights
+    lower_edges : Ascending lower edges of every bucket after the first
+
+    Returns
+    -------
+    The int64 total of each bucket
+
+    """
+    cdef Py_ssize_t n_edges = lower_edges.shape[0]
+    cdef Py_ssize_t i, b
+    cdef long long val
+
+    totals = np.zeros(n_edges + 1, dtype=np.int64)
+    cdef long long[::1] tot = totals
+    with nogil:
+        for i in range(values.shape[0]):
+            val = values[i]
+            if val <= 0:
+                continue
+            b = 0
+            while b < n_edges and val >= lower_edges[b]:
+                b += 1
+            tot[b] += val
+    return totals
@@ -121,8 +121,7 @@ median_plotting(bignavi_frames, 'Big Navi Median Pricing', e_vars=gpu_vars, roll
 
 ebay_seller_plot(bignavi_frames, 'Big Navi', gpu_vars)
 
-brand_plot(bignavi_frames, 'Big Navi AIB Comparison', e_vars=gpu_vars, roll=0)
-brand_plot(bignavi_frames, 'Big Navi AIB Comparison', e_vars=gpu_vars, roll=7)
+brand_plot(bignavi_frames, 'Big Navi AIB Comparison', e_vars=gpu_vars, roll=[0, 7])
 
 # ---------------------------------------------------------------------------------------------
 
@@ -146,8 +145,7 @@ median_plotting(ampere_frames, 'RTX 30 Series Median Pricing', e_vars=gpu_vars,
 
 ebay_seller_plot(ampere_frames, 'RTX 30 Series-Ampere', gpu_vars)
 
-brand_plot(ampere_frames, 'RTX 30 Series-Ampere AIB Comparison', e_vars=gpu_vars, roll=0)
-brand_plot(ampere_frames, 'RTX 30 Series-Ampere AIB Comparison', e_vars=gpu_vars, roll=7)
+brand_plot(ampere_frames, 'RTX 30 Series-Ampere AIB Comparison', e_vars=gpu_vars, roll=[0, 7])
 
 # ---------------------------------------------------------------------------------------------
 
@@ -122,8 +122,7 @@ mean_plotting(bignavi_frames, 'Big Navi Mean Pricing', e_vars=gpu_vars, roll=7,
 
 ebay_seller_plot(bignavi_frames, 'Big Navi', gpu_vars)
 
-brand_plot(bignavi_frames, 'Big Navi AIB Comparison', e_vars=gpu_vars, roll=0)
-brand_plot(bignavi_frames, 'Big Navi AIB Comparison', e_vars=gpu_vars, roll=7)
+brand_plot(bignavi_frames, 'Big Navi AIB Comparison', e_vars=gpu_vars, roll=[0, 7])
 
 # ---------------------------------------------------------------------------------------------
 # RTX 30 Series Analysis
@@ -151,8 +150,7 @@ mean_plotting(ampere_frames, 'RTX 30 Series Average Pricing', e_vars=gpu_vars, r
 
 ebay_seller_plot(ampere_frames, 'RTX 30 Series-Ampere', gpu_vars)
 
-brand_plot(ampere_frames, 'RTX 30 Series-Ampere AIB Comparison', e_vars=gpu_vars, roll=0)
-brand_plot(ampere_frames, 'RTX 30 Series-Ampere AIB Comparison', e_vars=gpu_vars, roll=7)
+brand_plot(ampere_frames, 'RTX 30 Series-Ampere AIB Comparison', e_vars=gpu_vars, roll=[0, 7])
 
 # ---------------------------------------------------------------------------------------------
 '''
@@ -106,8 +106,7 @@ median_plotting(bignavi_frames, 'Big Navi UK Median Pricing', e_vars=gpu_vars, r
 
 ebay_seller_plot(bignavi_frames, 'Big NaviUK ', gpu_vars)
 
-brand_plot(bignavi_frames, 'Big Navi UK AIB Comparison', e_vars=gpu_vars, roll=0)
-brand_plot(bignavi_frames, 'Big Navi UK AIB Comparison', e_vars=gpu_vars, roll=7)
+brand_plot(bignavi_frames, 'Big Navi UK AIB Comparison', e_vars=gpu_vars, roll=[0, 7])
 
 # ---------------------------------------------------------------------------------------------
 
@@ -130,8 +129,7 @@ median_plotting(ampere_frames, 'RTX 30 Series UK Median Pricing', e_vars=gpu_var
 
 ebay_seller_plot(ampere_frames, 'RTX 30 Series-Ampere UK', gpu_vars)
 
-brand_plot(ampere_frames, 'RTX 30 Series-Ampere UK AIB Comparison', e_vars=gpu_vars, roll=0)
-brand_plot(ampere_frames, 'RTX 30 Series-Ampere UK AIB Comparison', e_vars=gpu_vars, roll=7)
+brand_plot(ampere_frames, 'RTX 30 Series-Ampere UK AIB Comparison', e_vars=gpu_vars, roll=[0, 7])
 
 # ---------------------------------------------------------------------------------------------
 
@@ -0,0 +1,23 @@
+"""
+setup.py
+
+Builds the optional compiled kernels used by plotting.py, the program runs without them. Requires Cython and a C
+compiler:
+    python setup.py build_ext --inplace
+"""
+
+import sys
+
+from Cython.Build import cythonize
+from setuptools import Extension, setup
+
+if sys.platform == 'win32':
+    extra_compile_args = ['/O2']
+else:
+    extra_compile_args = ['-O3', '-march=native']
+
+setup(
+        name='plotting_kernels',
+        ext_modules=cythonize([Extension('plotting_kernels', ['plotting_kernels.pyx'],
+                                         extra_compile_args=extra_compile_args)]),
+)
@@ -4,9 +4,10 @@ util.py
 Various functions that get reused and don't belong in any other specific file
 
 Current functions:
-    prep_df - Cleanses a dataframe to prepare it for analysis
+    prep_df - Cleanses a dataframe to prepare it for analysis, the result is sorted by Sold Date
 """
 
+import numpy as np
 import pandas as pd
 
 
@@ -19,6 +20,7 @@ def prep_df(df: pd.DataFrame) -> pd.DataFrame:
     except Exception as e:
         print(e)
     df = df.sort_values(by='Sold Date')
-    df = df.loc[df.index.repeat(df['Quantity'])]
+    # Positional, so every row is repeated by its own Quantity without a label lookup (and even if labels repeat)
+    df = df.iloc[np.repeat(np.arange(len(df)), df['Quantity'].to_numpy(np.intp))]
     df['Quantity'] = 1
     return df